@@ -0,0 +1,261 @@
+"""
+Numeric core of ``settlement_stats``.
+
+The kernels take plain scalars (enums are passed as their integer values) and return
+tuples. ``settlement_stats`` calls them as ordinary Python functions (``PYTHON_KERNELS``): for
+a single tribe that is cheaper than a call into compiled code, and importing the module
+does not pull in Numba. Tight simulation loops can opt in to compiled kernels through
+``settlement_stats.compute_stats_compiled``, which uses ``load_compiled_kernels()``: it
+imports Numba only then and compiles (or loads from the cache) every kernel with an
+explicit signature. ``nogil=True`` lets several threads run the compiled kernels in
+parallel.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import types
+from typing import Any, Callable, Dict, Final, NamedTuple, Optional, Tuple
+
+
+# Таблицы индексируются значениями Climate и WaterBody (IntEnum).
+CLIMATE_COLD_MORTALITY: Final = (0, 10, 20, 30)
+CLIMATE_DISEASE_MORTALITY: Final = (20, 15, 10, 5)
+RAFT_FERTILITY_BONUS: Final = (0, 6, 4, 6, 8)
+
+# Рыбный бонус плотов по водоёму: (без ресурса рыбы, с ним). У моря он есть всегда.
+RAFT_FISH_BONUS: Final = ((0, 0), (0, 3), (2, 2), (0, 3), (0, 3))
+
+# Бонус плотов за шаг 20% с учётом рыбы, индекс: water_code * 2 + has_fish.
+# Без водоёма (базовый бонус 0) плоты ничего не дают.
+RAFT_PER_STEP: Final = tuple(
+    base + fish_bonus if base else 0
+    for base, fish_bonuses in zip(RAFT_FERTILITY_BONUS, RAFT_FISH_BONUS)
+    for fish_bonus in fish_bonuses
+)
+
+# Сигнатуры ядер: целые числа и коды перечислений — int64, флаги — bool.
+FERTILITY_SIGNATURE: Final = "UniTuple(i8, 4)(i8, i8, b1, i8, i8, i8, i8, i8, i8, i8, i8)"
+BATTLE_SIGNATURE: Final = "Tuple((f8, f8, i8, i8, i8))(i8, i8, i8, i8, i8, f8, b1)"
+PROD_SIGNATURE: Final = "UniTuple(i8, 4)(i8, i8, i8, i8)"
+SPEED_SQUADS_SIGNATURE: Final = "UniTuple(i8, 2)(i8, i8, i8, i8, i8, b1, b1, i8)"
+
+# Производство считается в целых числах: ОП — в сотых долях, модификаторы — в
+# базисных пунктах (1/10000).
+OP_SCALE: Final = 100
+BP_SCALE: Final = 10_000
+# Единица итога: ОП в 1/OP_SCALE, умноженные на множитель в базисных пунктах.
+TOTAL_OP_SCALE: Final = OP_SCALE * BP_SCALE
+
+# Эффекты культов по значению Cult:
+#                            NONE STRENGTH LABOUR MIND HEALTH BEAUTY RENUNCIATION
+CULT_PRODUCTION_BP: Final = (0, 0, 1000, 0, 0, 0, -1000)
+CULT_SCIENCE_BONUS: Final = (0, 0, 0, 1, 0, 0, -1)
+CULT_SPEED_DELTA: Final = (0, 0, 0, 0, 50, 0, -50)
+CULT_HUMAN_DNA: Final = (1, 1, 1, 1, 1, 1, 2)
+
+
+def _raft_bonus_formula(steps: int, water_code: int, has_fish: int, husbandry: int, agriculture: int) -> int:
+    per_step = RAFT_PER_STEP[water_code * 2 + (1 if has_fish else 0)]
+    if steps == 0 or per_step == 0:
+        return 0
+    penalty = 0
+    if husbandry:
+        penalty += 4 * steps
+    if agriculture:
+        penalty += 4 * steps
+    total_bonus = steps * per_step - penalty
+    return total_bonus if total_bonus > 0 else 0
+
+
+# Плоты покрывают 0..100% шагом 20%, поэтому все комбинации (шаг, водоём,
+# рыба/скотоводство/земледелие) считаются один раз при импорте.
+RAFT_STEPS: Final = 6
+RAFT_FLAG_COMBINATIONS: Final = 8
+_RAFT_LUT: Final = tuple(
+    _raft_bonus_formula(steps, water_code, bool(flags & 4), bool(flags & 2), bool(flags & 1))
+    for steps in range(RAFT_STEPS)
+    for water_code in range(len(RAFT_FERTILITY_BONUS))
+    for flags in range(RAFT_FLAG_COMBINATIONS)
+)
+
+
+def _raft_bonus(rafts_pct: int, water_code: int, flags: int) -> int:
+    # flags = has_fish << 2 | husbandry << 1 | agriculture
+    steps = rafts_pct // 20
+    if 0 <= steps < RAFT_STEPS:
+        try:
+            return _RAFT_LUT[(steps * len(RAFT_FERTILITY_BONUS) + water_code) * RAFT_FLAG_COMBINATIONS + flags]
+        except TypeError:  # дробные проценты плотов (float) считаются по формуле
+            pass
+    return _raft_bonus_formula(steps, water_code, flags & 4, flags & 2, flags & 1)
+
+
+def _raft_bonus_int(rafts_pct: int, water_code: int, flags: int) -> int:
+    # _raft_bonus для скомпилированных ядер: аргументы всегда int64, поэтому без try
+    steps = rafts_pct // 20
+    if 0 <= steps < RAFT_STEPS:
+        return _RAFT_LUT[(steps * len(RAFT_FERTILITY_BONUS) + water_code) * RAFT_FLAG_COMBINATIONS + flags]
+    return _raft_bonus_formula(steps, water_code, flags & 4, flags & 2, flags & 1)
+
+
+def _fertility_kernel(
+    base_fertility: int,
+    fertility_bonus: int,
+    near_fresh_water: bool,
+    climate_code: int,
+    cold_delta: int,
+    disease_delta: int,
+    clothing_pct: int,
+    alcohol_pct: int,
+    rafts_pct: int,
+    water_code: int,
+    raft_flags: int,
+) -> Tuple[int, int, int, int]:
+    # clothing_pct/alcohol_pct уже обнулены, если нет технологий одежды/алкоголизма
+    fertility = base_fertility + fertility_bonus
+    if near_fresh_water:
+        fertility += 10
+
+    cold_mortality = CLIMATE_COLD_MORTALITY[climate_code] + cold_delta
+    disease_mortality = CLIMATE_DISEASE_MORTALITY[climate_code] + disease_delta
+
+    # каждые 20% одежды снижают смертность от холода на 10, каждые 5% алкоголя — от болезней на 1
+    clothing_cut = (clothing_pct // 20) * 10
+    cold_mortality = cold_mortality - clothing_cut if cold_mortality > clothing_cut else 0
+    alcohol_cut = alcohol_pct // 5
+    disease_mortality = disease_mortality - alcohol_cut if disease_mortality > alcohol_cut else 0
+
+    raft_bonus = _raft_bonus(rafts_pct, water_code, raft_flags)
+    return fertility, cold_mortality, disease_mortality, raft_bonus
+
+
+def _battle_kernel(
+    population: int, experience: int, clubs: int, spears: int, bows: int, bm_pct: float, settlement: bool
+) -> Tuple[float, float, int, int, int]:
+    # оружие раздаётся от лучшего к худшему: луки, затем копья, затем дубины
+    bow_used = min(bows, population)
+    remaining = population - bow_used
+    spear_used = min(spears, remaining)
+    club_used = min(clubs, remaining - spear_used)
+    weapon_bonus = bow_used * 3 + spear_used * 2 + club_used
+    raw_power = float((population + weapon_bonus) * experience) * (1.0 + bm_pct)
+    scaled_power = raw_power / 4000.0
+    if settlement:
+        scaled_power *= 1.5
+    return raw_power, scaled_power, bow_used, spear_used, club_used
+
+
+def _prod_kernel(population: int, hammers_pct: int, cult_code: int, production_bp: int) -> Tuple[int, int, int, int]:
+    base_op = population * OP_SCALE
+    hammer_bonus = (hammers_pct // 10) * 5 * population  # +5% ОП за каждые 10% молотков
+    return base_op, hammer_bonus, CULT_PRODUCTION_BP[cult_code], production_bp
+
+
+def _speed_squads_kernel(
+    population: int, clubs: int, spears: int, bows: int, speed_delta: int, wagon: bool, wheel: bool, cult_code: int
+) -> Tuple[int, int]:
+    wagon_wheel = wagon and wheel
+    speed = 400 + speed_delta
+    if wagon_wheel:
+        # int(speed * 1.5) в целых числах: деление с отбрасыванием дробной части к нулю
+        speed = speed * 3 // 2 if speed >= 0 else -(-speed * 3 // 2)
+    speed += CULT_SPEED_DELTA[cult_code]
+
+    if wagon_wheel:
+        max_squads = 4  # повозка снимает ограничения дистанций
+    elif bows >= population:
+        max_squads = 4
+    elif spears >= population:
+        max_squads = 3
+    elif clubs >= population:
+        max_squads = 2
+    else:
+        max_squads = 1
+    return speed, max_squads
+
+
+# Имя экспортируемого ядра -> (функция в этом модуле, сигнатура для Numba).
+KERNEL_SIGNATURES: Final = {
+    "fertility_kernel": ("_fertility_kernel", FERTILITY_SIGNATURE),
+    "battle_kernel": ("_battle_kernel", BATTLE_SIGNATURE),
+    "prod_kernel": ("_prod_kernel", PROD_SIGNATURE),
+    "speed_squads_kernel": ("_speed_squads_kernel", SPEED_SQUADS_SIGNATURE),
+}
+
+
+class Kernels(NamedTuple):
+    fertility_kernel: Callable[..., Any]
+    battle_kernel: Callable[..., Any]
+    prod_kernel: Callable[..., Any]
+    speed_squads_kernel: Callable[..., Any]
+
+
+PYTHON_KERNELS: Final = Kernels(_fertility_kernel, _battle_kernel, _prod_kernel, _speed_squads_kernel)
+
+
+def _python_namespace() -> Dict[str, Any]:
+    # В сборке mypyc (setup_mypyc.py) функции модуля нативные и без __code__, поэтому
+    # Numba получает их из исходного _core_numba.py, выполненного как обычный модуль.
+    if isinstance(_fertility_kernel, types.FunctionType):
+        return dict(globals())
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_core_numba.py")
+    spec = importlib.util.spec_from_file_location("_core_numba_source", path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot load the source of _core_numba from {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # Numba находит модуль функций по имени
+    spec.loader.exec_module(module)
+    return dict(vars(module))
+
+
+def compilable_kernels() -> Dict[str, Callable[..., Any]]:
+    """Return the kernels with their helpers swapped for Numba-compiled ones.
+
+    The result is ready to be passed to ``numba.njit`` or ``numba.pycc``; it is keyed
+    like ``KERNEL_SIGNATURES``. Requires Numba.
+    """
+    from numba import njit
+
+    # Копии функций с отдельным словарём глобальных имён: в нём вспомогательные
+    # функции подменены скомпилированными, а сам модуль остаётся чистым Python.
+    namespace = _python_namespace()
+
+    def rebind(func: Any) -> Any:
+        return types.FunctionType(func.__code__, namespace, func.__name__, func.__defaults__, func.__closure__)
+
+    namespace["_raft_bonus_formula"] = njit(cache=True, nogil=True)(rebind(namespace["_raft_bonus_formula"]))
+    namespace["_raft_bonus"] = njit(cache=True, nogil=True)(rebind(namespace["_raft_bonus_int"]))
+    return {name: rebind(namespace[func_name]) for name, (func_name, _) in KERNEL_SIGNATURES.items()}
+
+
+_compiled_kernels: Optional[Kernels] = None
+
+
+def load_compiled_kernels() -> Kernels:
+    """Return compiled kernels, loading or compiling them on first use.
+
+    The extension built by ``build_aot.py`` is used when it is importable; only
+    otherwise is Numba imported to JIT-compile the kernels. They follow
+    ``KERNEL_SIGNATURES``: counts, percentages and enum codes are int64 and flags are
+    bool. Numba truncates a float passed as int64, so callers must pass whole numbers;
+    non-integral inputs belong on the plain-Python path, which keeps their fractions.
+    Raises ``ImportError`` when neither is available.
+    """
+    global _compiled_kernels
+    if _compiled_kernels is None:
+        try:  # ядра, заранее собранные build_aot.py, не требуют ни Numba, ни JIT-компиляции
+            import settlement_stats_kernels  # type: ignore[import-not-found]
+        except ImportError:
+            from numba import njit
+
+            sources = compilable_kernels()
+            kernels = {
+                name: njit(signature, cache=True, nogil=True)(sources[name])
+                for name, (_, signature) in KERNEL_SIGNATURES.items()
+            }
+        else:
+            kernels = {name: getattr(settlement_stats_kernels, name) for name in KERNEL_SIGNATURES}
+        _compiled_kernels = Kernels(**kernels)
+    return _compiled_kernels
@@ -0,0 +1,27 @@
+"""
+Ahead-of-time compile the Numba kernels from ``_core_numba`` into an extension module.
+
+Run ``python build_aot.py`` once (Numba and a C compiler are required) to produce
+``settlement_stats_kernels`` next to this file. ``_core_numba.load_compiled_kernels``
+picks the compiled kernels up automatically, so short runs skip JIT compilation.
+"""
+from __future__ import annotations
+
+import os
+
+from numba.pycc import CC
+
+import _core_numba
+
+
+def build() -> None:
+    cc = CC("settlement_stats_kernels")
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = _core_numba.compilable_kernels()
+    for name, (_, signature) in _core_numba.KERNEL_SIGNATURES.items():
+        cc.export(name, signature)(sources[name])
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build()
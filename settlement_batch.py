@@ -0,0 +1,527 @@
+"""
+Vectorised variant of ``settlement_stats`` for evaluating many tribes at once.
+
+Inputs are passed as a struct of arrays (``TribeBatch``): one NumPy array per
+``TribeInput`` field, all of the same length. Enum fields (climate, water body, cult) are encoded as small
+integer codes, the values of the ``Climate``/``WaterBody``/``Cult`` IntEnums. Every rule
+from ``settlement_stats`` is re-expressed with whole-array NumPy operations so the
+cost per tribe is a few C-level loop iterations instead of a chain of Python calls.
+
+``TribeWorld`` is a growable store in the same layout for long-lived simulations: tribes
+are appended one by one, booleans are bit-packed, and ``to_batch`` feeds ``compute_batch``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+from _core_numba import (
+    BP_SCALE,
+    CLIMATE_COLD_MORTALITY,
+    CLIMATE_DISEASE_MORTALITY,
+    CULT_HUMAN_DNA,
+    CULT_PRODUCTION_BP,
+    CULT_SCIENCE_BONUS,
+    CULT_SPEED_DELTA,
+    RAFT_PER_STEP,
+)
+from settlement_stats import (
+    Climate,
+    Cult,
+    Flag,
+    Items,
+    TechState,
+    ToolCoverage,
+    TraitEffects,
+    TribeInput,
+    WaterBody,
+    WeaponStock,
+)
+
+# Скалярные таблицы уже индексируются значениями IntEnum, поэтому переносятся как есть.
+COLD_LUT = np.array(CLIMATE_COLD_MORTALITY, dtype=np.int32)
+DISEASE_LUT = np.array(CLIMATE_DISEASE_MORTALITY, dtype=np.int32)
+RAFT_PER_STEP_LUT = np.array(RAFT_PER_STEP, dtype=np.int32)
+
+CULT_PRODUCTION_LUT = np.array(CULT_PRODUCTION_BP, dtype=np.float64) / BP_SCALE
+CULT_SCIENCE_LUT = np.array(CULT_SCIENCE_BONUS, dtype=np.int32)
+CULT_SPEED_LUT = np.array(CULT_SPEED_DELTA, dtype=np.int32)
+CULT_HUMAN_DNA_LUT = np.array(CULT_HUMAN_DNA, dtype=np.int32)
+
+# Значения по умолчанию совпадают с полями TribeInput и вложенных датаклассов.
+BATCH_DEFAULTS: Dict[str, object] = {
+    "population": 1000,
+    "experience": 4,
+    "base_fertility": 40,
+    "climate": int(Climate.TROPICAL),
+    "near_fresh_water": False,
+    "water_body": int(WaterBody.NONE),
+    "has_fish_resource": False,
+    "hammers_pct": 0,
+    "clothing_pct": 0,
+    "alcohol_pct": 0,
+    "rafts_pct": 0,
+    "clubs": 0,
+    "spears": 0,
+    "bows": 0,
+    "settlement": False,
+    "wagon": False,
+    "casino_totem": False,
+    "agriculture": False,
+    "husbandry": False,
+    "wheel": False,
+    "building": False,
+    "swimming": False,
+    "alcoholism": False,
+    "clothes": False,
+    "cult": int(Cult.NONE),
+    "fertility_bonus": 0,
+    "cold_mortality_delta": 0,
+    "disease_mortality_delta": 0,
+    "production_pct": 0.0,
+    "bm_pct": 0.0,
+    "speed_delta": 0,
+    "science_delta": 0,
+}
+
+# Поля-коды и перечисления, чьи значения они хранят.
+_CODE_FIELDS = {"climate": Climate, "water_body": WaterBody, "cult": Cult}
+
+
+def _dtype(key: str, default: object) -> type:
+    if isinstance(default, bool):
+        return np.bool_
+    if isinstance(default, float):
+        return np.float64
+    if key in _CODE_FIELDS:
+        return np.int8
+    # счётчики в int64, как i8 в ядрах: (население + оружие) * опыт и молотки * население
+    # не должны молча переполняться
+    return np.int64
+
+
+_DTYPES = {key: _dtype(key, default) for key, default in BATCH_DEFAULTS.items()}
+
+
+def _not_whole(key: str) -> ValueError:
+    return ValueError(f"field {key!r} must hold whole numbers")
+
+
+def _as_column(key: str, values: object) -> np.ndarray:
+    # приведение float -> int молча отбросило бы дробную часть, поэтому такие значения отклоняем
+    dtype = _DTYPES[key]
+    source = np.asarray(values)
+    if np.issubdtype(dtype, np.integer) and source.dtype.kind == "f" and not np.array_equal(source, np.trunc(source)):
+        raise _not_whole(key)
+    # код вне перечисления дал бы чужую строку таблицы (-1 — последнюю) или обернулся бы в int8
+    codes = _CODE_FIELDS.get(key)
+    if codes is not None and source.size and (source.min() < 0 or source.max() >= len(codes)):
+        raise ValueError(f"field {key!r} must hold {codes.__name__} codes 0..{len(codes) - 1}")
+    return source.astype(dtype, copy=False)
+
+
+@dataclass(slots=True, frozen=True)
+class TribeBatch:
+    population: np.ndarray
+    experience: np.ndarray
+    base_fertility: np.ndarray
+    climate: np.ndarray
+    near_fresh_water: np.ndarray
+    water_body: np.ndarray
+    has_fish_resource: np.ndarray
+    hammers_pct: np.ndarray
+    clothing_pct: np.ndarray
+    alcohol_pct: np.ndarray
+    rafts_pct: np.ndarray
+    clubs: np.ndarray
+    spears: np.ndarray
+    bows: np.ndarray
+    settlement: np.ndarray
+    wagon: np.ndarray
+    casino_totem: np.ndarray
+    agriculture: np.ndarray
+    husbandry: np.ndarray
+    wheel: np.ndarray
+    building: np.ndarray
+    swimming: np.ndarray
+    alcoholism: np.ndarray
+    clothes: np.ndarray
+    cult: np.ndarray
+    fertility_bonus: np.ndarray
+    cold_mortality_delta: np.ndarray
+    disease_mortality_delta: np.ndarray
+    production_pct: np.ndarray
+    bm_pct: np.ndarray
+    speed_delta: np.ndarray
+    science_delta: np.ndarray
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> TribeBatch:
+        """Build a batch from flattened field arrays, filling missing fields with defaults."""
+        unknown = sorted(key for key in arrays if key not in BATCH_DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown TribeInput fields: {', '.join(unknown)}")
+        shape = None
+        for key in BATCH_DEFAULTS:
+            if key in arrays:
+                shape = np.shape(arrays[key])
+                break
+        if shape is None:
+            raise ValueError("arrays must contain at least one TribeInput field")
+
+        columns: Dict[str, np.ndarray] = {}
+        for key, default in BATCH_DEFAULTS.items():
+            if key in arrays:
+                column = _as_column(key, arrays[key])
+                if column.shape != shape:
+                    raise ValueError(f"field {key!r} has shape {column.shape}, expected {shape}")
+            else:
+                column = np.full(shape, default, dtype=_DTYPES[key])
+            columns[key] = column
+        return cls(**columns)
+
+    @classmethod
+    def from_inputs(cls, inputs: Iterable[TribeInput]) -> TribeBatch:
+        return cls.from_arrays(inputs_to_arrays(inputs))
+
+    def __len__(self) -> int:
+        return len(self.population)
+
+
+@dataclass(slots=True, frozen=True)
+class TribeStatsBatch:
+    fertility: np.ndarray
+    cold_mortality: np.ndarray
+    disease_mortality: np.ndarray
+    raft_bonus: np.ndarray
+    growth_rate: np.ndarray
+    base_op: np.ndarray
+    hammer_bonus: np.ndarray
+    cult_modifier: np.ndarray
+    trait_modifier: np.ndarray
+    total_op: np.ndarray
+    battle_power_raw: np.ndarray
+    battle_power_scaled: np.ndarray
+    bows_used: np.ndarray
+    spears_used: np.ndarray
+    clubs_used: np.ndarray
+    passive_science: np.ndarray
+    cult_bonus: np.ndarray
+    item_bonus: np.ndarray
+    total_science: np.ndarray
+    dna_human: np.ndarray
+    dna_animal: np.ndarray
+    dna_plant: np.ndarray
+    speed: np.ndarray
+    max_squads: np.ndarray
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def _flatten_input(item: TribeInput) -> Dict[str, object]:
+    tools = item.tools
+    weapons = item.weapons
+    items = item.items
+    tech = item.tech
+    traits = item.trait_effects
+    return {
+        "population": item.population,
+        "experience": item.experience,
+        "base_fertility": item.base_fertility,
+        "climate": int(item.climate),
+        "near_fresh_water": item.near_fresh_water,
+        "water_body": int(item.water_body),
+        "has_fish_resource": item.has_fish_resource,
+        "hammers_pct": tools.hammers_pct,
+        "clothing_pct": tools.clothing_pct,
+        "alcohol_pct": tools.alcohol_pct,
+        "rafts_pct": tools.rafts_pct,
+        "clubs": weapons.clubs,
+        "spears": weapons.spears,
+        "bows": weapons.bows,
+        "settlement": items.settlement,
+        "wagon": items.wagon,
+        "casino_totem": items.casino_totem,
+        "agriculture": tech.agriculture,
+        "husbandry": tech.husbandry,
+        "wheel": tech.wheel,
+        "building": tech.building,
+        "swimming": tech.swimming,
+        "alcoholism": tech.alcoholism,
+        "clothes": tech.clothes,
+        "cult": int(item.cult),
+        "fertility_bonus": traits.fertility_bonus,
+        "cold_mortality_delta": traits.cold_mortality_delta,
+        "disease_mortality_delta": traits.disease_mortality_delta,
+        "production_pct": traits.production_pct,
+        "bm_pct": traits.bm_pct,
+        "speed_delta": traits.speed_delta,
+        "science_delta": traits.science_delta,
+    }
+
+
+def _unflatten_input(v: Mapping[str, Any]) -> TribeInput:
+    return TribeInput(
+        population=v["population"],
+        experience=v["experience"],
+        base_fertility=v["base_fertility"],
+        climate=Climate(v["climate"]),
+        near_fresh_water=v["near_fresh_water"],
+        water_body=WaterBody(v["water_body"]),
+        has_fish_resource=v["has_fish_resource"],
+        tools=ToolCoverage(v["hammers_pct"], v["clothing_pct"], v["alcohol_pct"], v["rafts_pct"]),
+        weapons=WeaponStock(v["clubs"], v["spears"], v["bows"]),
+        items=Items(v["settlement"], v["wagon"], v["casino_totem"]),
+        tech=TechState(
+            v["agriculture"],
+            v["husbandry"],
+            v["wheel"],
+            v["building"],
+            v["swimming"],
+            v["alcoholism"],
+            v["clothes"],
+        ),
+        cult=Cult(v["cult"]),
+        trait_effects=TraitEffects(
+            v["fertility_bonus"],
+            v["cold_mortality_delta"],
+            v["disease_mortality_delta"],
+            v["production_pct"],
+            v["bm_pct"],
+            v["speed_delta"],
+            v["science_delta"],
+        ),
+    )
+
+
+def inputs_to_arrays(inputs: Iterable[TribeInput]) -> Dict[str, np.ndarray]:
+    """Convert a sequence of ``TribeInput`` objects into the struct-of-arrays layout."""
+    columns: Dict[str, list] = {key: [] for key in BATCH_DEFAULTS}
+    for item in inputs:
+        for key, value in _flatten_input(item).items():
+            columns[key].append(value)
+    return {key: _as_column(key, values) for key, values in columns.items()}
+
+
+# Булевы поля TribeInput и их биты в TribeWorld.flags (та же раскладка, что у TribeInput._flags).
+WORLD_FLAG_BITS = {
+    "settlement": int(Flag.SETTLEMENT),
+    "wagon": int(Flag.WAGON),
+    "casino_totem": int(Flag.CASINO),
+    "agriculture": int(Flag.AGRI),
+    "husbandry": int(Flag.HUSB),
+    "wheel": int(Flag.WHEEL),
+    "building": int(Flag.BUILDING),
+    "swimming": int(Flag.SWIMMING),
+    "alcoholism": int(Flag.ALCOHOLISM),
+    "clothes": int(Flag.CLOTHES),
+    "near_fresh_water": int(Flag.FRESH_WATER),
+    "has_fish_resource": int(Flag.FISH),
+}
+WORLD_FLAG_FIELDS = tuple(WORLD_FLAG_BITS)
+_WORLD_COLUMNS = tuple(key for key in BATCH_DEFAULTS if key not in WORLD_FLAG_BITS)
+
+
+class TribeWorld:
+    """Growable struct-of-arrays store for a map full of tribes.
+
+    Every numeric ``TribeInput`` field is kept in its own contiguous array (see
+    ``column``); the boolean fields are packed into the ``flags`` uint32 array, one bit
+    per name in ``WORLD_FLAG_FIELDS`` laid out as ``settlement_stats.Flag``. ``to_batch`` hands the stored tribes to
+    ``compute_batch`` without creating any ``TribeInput`` objects.
+    """
+
+    __slots__ = ("_columns", "_flags", "_size")
+
+    def __init__(self, capacity: int = 64) -> None:
+        capacity = max(1, capacity)
+        self._columns: Dict[str, np.ndarray] = {key: np.zeros(capacity, dtype=_DTYPES[key]) for key in _WORLD_COLUMNS}
+        self._flags = np.zeros(capacity, dtype=np.uint32)
+        self._size = 0
+
+    @classmethod
+    def from_inputs(cls, inputs: Iterable[TribeInput], capacity: Optional[int] = None) -> TribeWorld:
+        world = cls() if capacity is None else cls(capacity)
+        for item in inputs:
+            world.add_tribe(item)
+        return world
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, key: str) -> np.ndarray:
+        """View of one numeric field over the stored tribes."""
+        return self._columns[key][: self._size]
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._flags[: self._size]
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._flags)
+        size = self._size
+        for key, array in self._columns.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:size] = array[:size]
+            self._columns[key] = grown
+        flags = np.zeros(capacity, dtype=np.uint32)
+        flags[:size] = self._flags[:size]
+        self._flags = flags
+
+    def add_tribe(self, input_data: TribeInput) -> int:
+        """Append a tribe and return its index."""
+        if self._size == len(self._flags):
+            self._grow()
+        index = self._size
+        values = _flatten_input(input_data)
+        for key, array in self._columns.items():
+            value = values[key]
+            if isinstance(value, float) and array.dtype.kind == "i" and not value.is_integer():
+                raise _not_whole(key)
+            array[index] = value
+        self._flags[index] = input_data._flags
+        self._size = index + 1
+        return index
+
+    def to_input(self, index: int) -> TribeInput:
+        if not 0 <= index < self._size:
+            raise IndexError(f"tribe index {index} out of range for {self._size} tribes")
+        values: Dict[str, object] = {key: array[index].item() for key, array in self._columns.items()}
+        flags = int(self._flags[index])
+        for key, bit in WORLD_FLAG_BITS.items():
+            values[key] = bool(flags & bit)
+        return _unflatten_input(values)
+
+    def to_batch(self) -> TribeBatch:
+        """Expose the stored tribes as a ``TribeBatch``; numeric columns are views, not copies."""
+        columns = {key: self.column(key) for key in _WORLD_COLUMNS}
+        flags = self.flags
+        for key, bit in WORLD_FLAG_BITS.items():
+            columns[key] = (flags & bit) != 0
+        return TribeBatch(**columns)
+
+
+def _fertility_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    fertility = b.base_fertility + b.fertility_bonus + b.near_fresh_water * 10
+
+    cold = COLD_LUT[b.climate] + b.cold_mortality_delta
+    disease = DISEASE_LUT[b.climate] + b.disease_mortality_delta
+    clothing_pct = np.where(b.clothes, b.clothing_pct, 0)
+    alcohol_pct = np.where(b.alcoholism, b.alcohol_pct, 0)
+    cold = np.maximum(0, cold - (clothing_pct // 20) * 10)
+    disease = np.maximum(0, disease - alcohol_pct // 5)
+
+    steps = b.rafts_pct // 20
+    per_step = RAFT_PER_STEP_LUT[b.water_body * 2 + b.has_fish_resource]
+    penalty = (b.husbandry * 4 + b.agriculture * 4) * steps
+    raft = np.maximum(0, steps * per_step - penalty)
+    raft = np.where((b.rafts_pct == 0) | (per_step == 0), 0, raft)
+
+    return {
+        "fertility": fertility,
+        "cold_mortality": cold,
+        "disease_mortality": disease,
+        "raft_bonus": raft,
+        "growth_rate": fertility + raft - cold - disease,
+    }
+
+
+def _production_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    base_op = b.population.astype(np.float64)
+    hammer_bonus = (b.hammers_pct // 10) * 0.05 * b.population
+    cult_modifier = CULT_PRODUCTION_LUT[b.cult]
+    # как _production_bp в скалярном пути: модификатор квантуется до базисного пункта
+    trait_modifier = np.round(b.production_pct * BP_SCALE) / BP_SCALE
+    return {
+        "base_op": base_op,
+        "hammer_bonus": hammer_bonus,
+        "cult_modifier": cult_modifier,
+        "trait_modifier": trait_modifier,
+        "total_op": (base_op + hammer_bonus) * (1 + cult_modifier + trait_modifier),
+    }
+
+
+def _battle_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    population = b.population
+    bows_used = np.minimum(b.bows, population)
+    remaining = population - bows_used
+    spears_used = np.minimum(b.spears, remaining)
+    remaining = remaining - spears_used
+    clubs_used = np.minimum(b.clubs, remaining)
+
+    weapon_bonus = clubs_used + spears_used * 2 + bows_used * 3
+    raw_power = (population + weapon_bonus) * b.experience * (1.0 + b.bm_pct)
+    scaled_power = raw_power / 4000.0 * np.where(b.settlement, 1.5, 1.0)
+    return {
+        "battle_power_raw": raw_power,
+        "battle_power_scaled": scaled_power,
+        "bows_used": bows_used,
+        "spears_used": spears_used,
+        "clubs_used": clubs_used,
+    }
+
+
+def _science_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    passive = 2 + (b.settlement & b.building)
+    cult_bonus = CULT_SCIENCE_LUT[b.cult]
+    item_bonus = b.science_delta
+    return {
+        "passive_science": passive,
+        "cult_bonus": cult_bonus,
+        "item_bonus": item_bonus,
+        "total_science": passive + cult_bonus + item_bonus,
+    }
+
+
+def _dna_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    multiplier = np.where(b.alcoholism, 2, 1)
+    return {
+        "dna_human": CULT_HUMAN_DNA_LUT[b.cult] * multiplier,
+        "dna_animal": b.husbandry * multiplier,
+        "dna_plant": b.agriculture * multiplier,
+    }
+
+
+def _speed_and_squads_batch(b: TribeBatch) -> Dict[str, np.ndarray]:
+    population = b.population
+    wagon_wheel = b.wagon & b.wheel
+
+    speed = 400 + b.speed_delta
+    # int(speed * 1.5) в целых числах: деление с отбрасыванием дробной части к нулю
+    wagon_speed = np.where(speed >= 0, speed * 3 // 2, -(-speed * 3 // 2))
+    speed = np.where(wagon_wheel, wagon_speed, speed)
+    speed = speed + CULT_SPEED_LUT[b.cult]
+
+    max_squads = np.where(
+        b.bows >= population,
+        4,
+        np.where(b.spears >= population, 3, np.where(b.clubs >= population, 2, 1)),
+    )
+    max_squads = np.where(wagon_wheel, 4, max_squads)
+    return {"speed": speed, "max_squads": max_squads}
+
+
+def compute_batch(batch: TribeBatch) -> TribeStatsBatch:
+    return TribeStatsBatch(
+        **_fertility_batch(batch),
+        **_production_batch(batch),
+        **_battle_batch(batch),
+        **_science_batch(batch),
+        **_dna_batch(batch),
+        **_speed_and_squads_batch(batch),
+    )
+
+
+def compute_stats_batch(arrays: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Compute the stats of many tribes at once.
+
+    ``arrays`` maps flattened ``TribeInput`` field names (see ``BATCH_DEFAULTS``) to
+    equally shaped arrays; missing fields take their default value. The result maps
+    every stat from ``TribeStats`` to an array of the same shape. Weapon usage and DNA
+    income are flattened to ``bows_used``/``spears_used``/``clubs_used`` and
+    ``dna_human``/``dna_animal``/``dna_plant``.
+    """
+    return compute_batch(TribeBatch.from_arrays(arrays)).as_dict()
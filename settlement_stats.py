@@ -9,40 +9,92 @@ inputs and recalculating the stats interactively.
 """
 from __future__ import annotations
 
-import argparse
-import tkinter as tk
-from dataclasses import dataclass, field
-from enum import Enum
-from tkinter import ttk
-from typing import Dict, List, Optional
-
-
-class Climate(Enum):
-    TROPICAL = "tropical"
-    TEMPERATE = "temperate"
-    POLAR = "polar"
-    SNOW = "snow"
-
-
-class WaterBody(Enum):
-    NONE = "none"
-    RIVER = "river"
-    SEA = "sea"
-    ENDORHEIC_LAKE = "endorheic_lake"  # бесточное озеро
-    FLOWING_LAKE = "flowing_lake"      # проточное озеро
-
-
-class Cult(Enum):
-    NONE = "none"
-    STRENGTH = "strength"
-    LABOUR = "labour"
-    MIND = "mind"
-    HEALTH = "health"
-    BEAUTY = "beauty"
-    RENUNCIATION = "renunciation"
-
-
-@dataclass
+import copyreg
+from dataclasses import dataclass, field, fields, replace
+from enum import IntEnum, IntFlag
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, Final, Iterable, NamedTuple, Set, Tuple, Union
+
+from _core_numba import (
+    BP_SCALE,
+    CULT_HUMAN_DNA,
+    CULT_SCIENCE_BONUS,
+    OP_SCALE,
+    PYTHON_KERNELS,
+    TOTAL_OP_SCALE,
+    Kernels,
+    load_compiled_kernels,
+)
+
+
+class Climate(IntEnum):
+    TROPICAL = 0
+    TEMPERATE = 1
+    POLAR = 2
+    SNOW = 3
+
+
+class WaterBody(IntEnum):
+    NONE = 0
+    RIVER = 1
+    SEA = 2
+    ENDORHEIC_LAKE = 3  # бесточное озеро
+    FLOWING_LAKE = 4    # проточное озеро
+
+
+class Cult(IntEnum):
+    NONE = 0
+    STRENGTH = 1
+    LABOUR = 2
+    MIND = 3
+    HEALTH = 4
+    BEAUTY = 5
+    RENUNCIATION = 6
+
+
+class Flag(IntFlag):
+    """Bit layout of ``TribeInput._flags``: the boolean items, techs and terrain features."""
+
+    SETTLEMENT = 1
+    WAGON = 2
+    CASINO = 4
+    AGRI = 8
+    HUSB = 16
+    WHEEL = 32
+    BUILDING = 64
+    SWIMMING = 128
+    ALCOHOLISM = 256
+    CLOTHES = 512
+    FRESH_WATER = 1024
+    FISH = 2048
+
+
+# Операции над членами IntFlag идут через Python-код enum, поэтому в горячих
+# функциях биты проверяются обычными int.
+_FLAG_SETTLEMENT: Final = int(Flag.SETTLEMENT)
+_FLAG_WAGON: Final = int(Flag.WAGON)
+_FLAG_CASINO: Final = int(Flag.CASINO)
+_FLAG_AGRI: Final = int(Flag.AGRI)
+_FLAG_HUSB: Final = int(Flag.HUSB)
+_FLAG_WHEEL: Final = int(Flag.WHEEL)
+_FLAG_BUILDING: Final = int(Flag.BUILDING)
+_FLAG_SWIMMING: Final = int(Flag.SWIMMING)
+_FLAG_ALCOHOLISM: Final = int(Flag.ALCOHOLISM)
+_FLAG_CLOTHES: Final = int(Flag.CLOTHES)
+_FLAG_FRESH_WATER: Final = int(Flag.FRESH_WATER)
+_FLAG_FISH: Final = int(Flag.FISH)
+_SETTLEMENT_BUILDING: Final = _FLAG_SETTLEMENT | _FLAG_BUILDING
+
+# Биты, от которых зависит каждый раздел TribeStats (см. changed_sections).
+_FERTILITY_FLAGS: Final = int(Flag.FRESH_WATER | Flag.FISH | Flag.HUSB | Flag.AGRI)
+_BATTLE_FLAGS: Final = int(Flag.SETTLEMENT)
+_SCIENCE_FLAGS: Final = _SETTLEMENT_BUILDING
+_DNA_FLAGS: Final = int(Flag.ALCOHOLISM | Flag.HUSB | Flag.AGRI)
+_SPEED_FLAGS: Final = int(Flag.WAGON | Flag.WHEEL)
+
+
+@dataclass(slots=True, frozen=True)
 class WeaponStock:
     clubs: int = 0
     spears: int = 0
@@ -52,7 +104,7 @@ class WeaponStock:
         return self.clubs + self.spears + self.bows
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ToolCoverage:
     hammers_pct: int = 0  # multiples of 10%
     clothing_pct: int = 0  # multiples of 20%
@@ -60,14 +112,14 @@ class ToolCoverage:
     rafts_pct: int = 0  # must be 0 or multiples of 20%
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Items:
     settlement: bool = False
     wagon: bool = False
     casino_totem: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TechState:
     agriculture: bool = False
     husbandry: bool = False
@@ -78,7 +130,7 @@ class TechState:
     clothes: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraitEffects:
     fertility_bonus: int = 0
     cold_mortality_delta: int = 0
@@ -88,9 +140,28 @@ class TraitEffects:
     speed_delta: int = 0
     science_delta: int = 0
 
+    def __post_init__(self) -> None:
+        # целые 0 или 1 от вызывающего кода приводим к float, чтобы арифметика с процентами
+        # всегда шла по одному типу
+        object.__setattr__(self, "production_pct", float(self.production_pct))
+        object.__setattr__(self, "bm_pct", float(self.bm_pct))
+
 
-@dataclass
-class TribeInput:
+class _DerivedInput:
+    # Производные значения для ядер расчёта, считаются один раз при создании TribeInput.
+    # Это слоты базового класса, а не поля dataclass, поэтому в fields(), asdict() и
+    # astuple() их нет.
+    __slots__ = ("_eff_clothing", "_eff_alcohol", "_raft_flags", "_flags", "_production_bp", "_hash")
+    _eff_clothing: int
+    _eff_alcohol: int
+    _raft_flags: int
+    _flags: int
+    _production_bp: int
+    _hash: int
+
+
+@dataclass(slots=True, frozen=True)
+class TribeInput(_DerivedInput):
     population: int = 1000
     experience: int = 4
     base_fertility: int = 40
@@ -105,122 +176,177 @@ class TribeInput:
     cult: Cult = Cult.NONE
     trait_effects: TraitEffects = field(default_factory=TraitEffects)
 
-
-@dataclass
+    def __post_init__(self) -> None:
+        set_field = object.__setattr__
+        set_field(self, "_eff_clothing", self.tools.clothing_pct if self.tech.clothes else 0)
+        set_field(self, "_eff_alcohol", self.tools.alcohol_pct if self.tech.alcoholism else 0)
+        set_field(
+            self,
+            "_raft_flags",
+            (self.has_fish_resource << 2) | (self.tech.husbandry << 1) | self.tech.agriculture,
+        )
+        set_field(self, "_production_bp", round(self.trait_effects.production_pct * BP_SCALE))
+        items = self.items
+        tech = self.tech
+        set_field(
+            self,
+            "_flags",
+            (_FLAG_SETTLEMENT if items.settlement else 0)
+            | (_FLAG_WAGON if items.wagon else 0)
+            | (_FLAG_CASINO if items.casino_totem else 0)
+            | (_FLAG_AGRI if tech.agriculture else 0)
+            | (_FLAG_HUSB if tech.husbandry else 0)
+            | (_FLAG_WHEEL if tech.wheel else 0)
+            | (_FLAG_BUILDING if tech.building else 0)
+            | (_FLAG_SWIMMING if tech.swimming else 0)
+            | (_FLAG_ALCOHOLISM if tech.alcoholism else 0)
+            | (_FLAG_CLOTHES if tech.clothes else 0)
+            | (_FLAG_FRESH_WATER if self.near_fresh_water else 0)
+            | (_FLAG_FISH if self.has_fish_resource else 0),
+        )
+        # хэш нужен ключу lru_cache в compute_stats, считаем его один раз; слот заполняется
+        # сразу, иначе pickle, copy и asdict не смогут прочитать ещё не вычисленное поле
+        set_field(self, "_hash", hash(_tribe_input_key(self)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+_tribe_input_key = attrgetter(*(f.name for f in fields(TribeInput)))
+
+
+@dataclass(slots=True, frozen=True)
 class FertilityBreakdown:
     fertility: int
     cold_mortality: int
     disease_mortality: int
     raft_bonus: int
+    growth_rate: int = field(init=False)
 
-    @property
-    def growth_rate(self) -> int:
-        return self.fertility + self.raft_bonus - self.cold_mortality - self.disease_mortality
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self, "growth_rate", self.fertility + self.raft_bonus - self.cold_mortality - self.disease_mortality
+        )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProductionStats:
-    base_op: float
-    hammer_bonus: float
-    cult_modifier: float
-    trait_modifier: float
+    # ОП в 1/OP_SCALE, модификаторы в базисных пунктах; total_op_scaled_bp — точное
+    # произведение в 1/TOTAL_OP_SCALE ОП. Свойства без суффиксов отдают то же в дробных
+    # ОП и долях, как столбцы TribeStatsBatch.
+    base_op_scaled: int
+    hammer_bonus_scaled: int
+    cult_modifier_bp: int
+    trait_modifier_bp: int
+    total_op_scaled_bp: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "total_op_scaled_bp",
+            (self.base_op_scaled + self.hammer_bonus_scaled) * (BP_SCALE + self.cult_modifier_bp + self.trait_modifier_bp),
+        )
+
+    @property
+    def base_op(self) -> float:
+        return self.base_op_scaled / OP_SCALE
+
+    @property
+    def hammer_bonus(self) -> float:
+        return self.hammer_bonus_scaled / OP_SCALE
+
+    @property
+    def cult_modifier(self) -> float:
+        return self.cult_modifier_bp / BP_SCALE
+
+    @property
+    def trait_modifier(self) -> float:
+        return self.trait_modifier_bp / BP_SCALE
 
     @property
     def total_op(self) -> float:
-        return (self.base_op + self.hammer_bonus) * (1 + self.cult_modifier + self.trait_modifier)
+        return self.total_op_scaled_bp / TOTAL_OP_SCALE
+
+
+class WeaponUsage(NamedTuple):
+    bows: int
+    spears: int
+    clubs: int
 
 
-@dataclass
+class DnaIncome(NamedTuple):
+    human: int
+    animal: int
+    plant: int
+
+
+@dataclass(slots=True, frozen=True)
 class BattleStats:
     battle_power_raw: float
     battle_power_scaled: float
-    weapon_usage: Dict[str, int]
+    weapon_usage: WeaponUsage
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScienceStats:
     passive_science: int
     cult_bonus: int
     item_bonus: int
+    total_science: int = field(init=False)
 
-    @property
-    def total_science(self) -> int:
-        return self.passive_science + self.cult_bonus + self.item_bonus
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "total_science", self.passive_science + self.cult_bonus + self.item_bonus)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TribeStats:
     fertility: FertilityBreakdown
     production: ProductionStats
     battle: BattleStats
     science: ScienceStats
-    dna_income: Dict[str, int]
+    dna_income: DnaIncome
     speed: int
     max_squads: int
 
 
-CLIMATE_COLD_MORTALITY = {
-    Climate.TROPICAL: 0,
-    Climate.TEMPERATE: 10,
-    Climate.POLAR: 20,
-    Climate.SNOW: 30,
-}
-
-CLIMATE_DISEASE_MORTALITY = {
-    Climate.TROPICAL: 20,
-    Climate.TEMPERATE: 15,
-    Climate.POLAR: 10,
-    Climate.SNOW: 5,
-}
-
-RAFT_FERTILITY_BONUS = {
-    WaterBody.SEA: 4,
-    WaterBody.RIVER: 6,
-    WaterBody.ENDORHEIC_LAKE: 6,
-    WaterBody.FLOWING_LAKE: 8,
-}
-
-
-def _apply_clothing(cold_mortality: int, coverage_pct: int) -> int:
-    steps = coverage_pct // 20
-    return max(0, cold_mortality - steps * 10)
-
-
-def _apply_alcohol(disease_mortality: int, coverage_pct: int) -> int:
-    steps = coverage_pct // 5
-    return max(0, disease_mortality - steps)
-
-
-def _raft_bonus(input_data: TribeInput) -> int:
-    if input_data.tools.rafts_pct == 0:
-        return 0
-    steps = input_data.tools.rafts_pct // 20
-    base_bonus = RAFT_FERTILITY_BONUS.get(input_data.water_body, 0)
-    if base_bonus == 0:
-        return 0
-    fish_bonus = 2 if input_data.water_body == WaterBody.SEA else 3 if input_data.has_fish_resource else 0
-    penalty = 0
-    if input_data.tech.husbandry:
-        penalty += 4 * steps
-    if input_data.tech.agriculture:
-        penalty += 4 * steps
-    total_bonus = steps * (base_bonus + fish_bonus) - penalty
-    return max(0, total_bonus)
-
-
-def calculate_fertility(input_data: TribeInput) -> FertilityBreakdown:
-    fertility = input_data.base_fertility + input_data.trait_effects.fertility_bonus
-    if input_data.near_fresh_water:
-        fertility += 10
-
-    cold_mortality = CLIMATE_COLD_MORTALITY[input_data.climate] + input_data.trait_effects.cold_mortality_delta
-    disease_mortality = CLIMATE_DISEASE_MORTALITY[input_data.climate] + input_data.trait_effects.disease_mortality_delta
-
-    cold_mortality = _apply_clothing(cold_mortality, input_data.tools.clothing_pct if input_data.tech.clothes else 0)
-    disease_mortality = _apply_alcohol(disease_mortality, input_data.tools.alcohol_pct if input_data.tech.alcoholism else 0)
-
-    raft_bonus = _raft_bonus(input_data)
-
+def _reduce_frozen(obj: Any) -> Tuple[Any, ...]:
+    # pickle и copy восстанавливают объекты через __init__: так заново заполняются
+    # производные слоты TribeInput, а в сборке mypyc не вызывается __setstate__, который
+    # присваивает поля замороженного объекта и падает с FrozenInstanceError
+    return type(obj), tuple(getattr(obj, f.name) for f in fields(obj) if f.init)
+
+
+for _frozen_cls in (
+    WeaponStock,
+    ToolCoverage,
+    Items,
+    TechState,
+    TraitEffects,
+    TribeInput,
+    FertilityBreakdown,
+    ProductionStats,
+    BattleStats,
+    ScienceStats,
+    TribeStats,
+):
+    copyreg.pickle(_frozen_cls, _reduce_frozen)
+
+
+def calculate_fertility(input_data: TribeInput, kernels: Kernels = PYTHON_KERNELS) -> FertilityBreakdown:
+    traits = input_data.trait_effects
+    fertility, cold_mortality, disease_mortality, raft_bonus = kernels.fertility_kernel(
+        input_data.base_fertility,
+        traits.fertility_bonus,
+        input_data.near_fresh_water,
+        input_data.climate,
+        traits.cold_mortality_delta,
+        traits.disease_mortality_delta,
+        input_data._eff_clothing,
+        input_data._eff_alcohol,
+        input_data.tools.rafts_pct,
+        input_data.water_body,
+        input_data._raft_flags,
+    )
     return FertilityBreakdown(
         fertility=fertility,
         cold_mortality=cold_mortality,
@@ -229,118 +355,79 @@ def calculate_fertility(input_data: TribeInput) -> FertilityBreakdown:
     )
 
 
-def _weapon_allocation(population: int, weapons: WeaponStock) -> Dict[str, int]:
-    remaining = population
-    usage: Dict[str, int] = {}
-    bow_used = min(weapons.bows, remaining)
-    remaining -= bow_used
-    usage["bows"] = bow_used
-
-    spear_used = min(weapons.spears, remaining)
-    remaining -= spear_used
-    usage["spears"] = spear_used
-
-    club_used = min(weapons.clubs, remaining)
-    remaining -= club_used
-    usage["clubs"] = club_used
-    return usage
+def calculate_battle_stats(input_data: TribeInput, kernels: Kernels = PYTHON_KERNELS) -> BattleStats:
+    weapons = input_data.weapons
+    raw_power, scaled_power, bow_used, spear_used, club_used = kernels.battle_kernel(
+        input_data.population,
+        input_data.experience,
+        weapons.clubs,
+        weapons.spears,
+        weapons.bows,
+        input_data.trait_effects.bm_pct,
+        input_data.items.settlement,
+    )
+    return BattleStats(
+        battle_power_raw=raw_power,
+        battle_power_scaled=scaled_power,
+        weapon_usage=WeaponUsage(bow_used, spear_used, club_used),
+    )
 
 
-def calculate_battle_stats(input_data: TribeInput) -> BattleStats:
-    weapon_usage = _weapon_allocation(input_data.population, input_data.weapons)
-    weapon_bonus = (
-        weapon_usage["clubs"] * 1
-        + weapon_usage["spears"] * 2
-        + weapon_usage["bows"] * 3
+def calculate_production(input_data: TribeInput, kernels: Kernels = PYTHON_KERNELS) -> ProductionStats:
+    base_op, hammer_bonus, cult_modifier, trait_modifier = kernels.prod_kernel(
+        input_data.population,
+        input_data.tools.hammers_pct,
+        input_data.cult,
+        input_data._production_bp,
+    )
+    return ProductionStats(
+        base_op_scaled=base_op,
+        hammer_bonus_scaled=hammer_bonus,
+        cult_modifier_bp=cult_modifier,
+        trait_modifier_bp=trait_modifier,
     )
-    raw_power = (input_data.population + weapon_bonus) * input_data.experience
-    raw_power *= 1 + input_data.trait_effects.bm_pct
-    scaled_power = raw_power / 4000.0
-    if input_data.items.settlement:
-        scaled_power *= 1.5
-    return BattleStats(battle_power_raw=raw_power, battle_power_scaled=scaled_power, weapon_usage=weapon_usage)
 
 
-def calculate_production(input_data: TribeInput) -> ProductionStats:
-    base_op = float(input_data.population)
-    hammer_bonus = (input_data.tools.hammers_pct // 10) * 0.05 * input_data.population
+def calculate_science(input_data: TribeInput) -> ScienceStats:
+    # 2 науки у каждого поселения по дефолту, +1 за поселение со строительством
+    passive = 2 + (input_data._flags & _SETTLEMENT_BUILDING == _SETTLEMENT_BUILDING)
+    # Тотем казино даёт науку только с шансом; пока нет стохастической модели, он не учитывается.
+    return ScienceStats(
+        passive, CULT_SCIENCE_BONUS[input_data.cult], input_data.trait_effects.science_delta
+    )
 
-    cult_modifier = 0.0
-    if input_data.cult == Cult.LABOUR:
-        cult_modifier = 0.10
-    elif input_data.cult == Cult.RENUNCIATION:
-        cult_modifier = -0.10
 
-    trait_modifier = input_data.trait_effects.production_pct
-    return ProductionStats(
-        base_op=base_op,
-        hammer_bonus=hammer_bonus,
-        cult_modifier=cult_modifier,
-        trait_modifier=trait_modifier,
+def calculate_dna_income(input_data: TribeInput) -> DnaIncome:
+    flags = input_data._flags
+    multiplier = 2 if flags & _FLAG_ALCOHOLISM else 1  # алкоголь удваивает
+    return DnaIncome(
+        CULT_HUMAN_DNA[input_data.cult] * multiplier,
+        multiplier if flags & _FLAG_HUSB else 0,
+        multiplier if flags & _FLAG_AGRI else 0,
     )
 
 
-def calculate_science(input_data: TribeInput) -> ScienceStats:
-    passive = 0
-    if input_data.items.settlement and input_data.tech.building:
-        passive += 1
-    passive += 2  # каждое поселение по дефолту генерирует 2 науки
-
-    cult_bonus = 1 if input_data.cult == Cult.MIND else -1 if input_data.cult == Cult.RENUNCIATION else 0
-    item_bonus = 0
-    if input_data.items.casino_totem:
-        item_bonus += 0  # ожидаемое значение оставляем нулём, шанс не моделируем детерминированно
-    item_bonus += input_data.trait_effects.science_delta
-    return ScienceStats(passive_science=passive, cult_bonus=cult_bonus, item_bonus=item_bonus)
-
-
-def calculate_dna_income(input_data: TribeInput) -> Dict[str, int]:
-    human = 1 + (1 if input_data.cult == Cult.RENUNCIATION else 0)
-    animal = 1 if input_data.tech.husbandry else 0
-    plant = 1 if input_data.tech.agriculture else 0
-    # алкоголь удваивает
-    if input_data.tech.alcoholism:
-        human *= 2
-        animal *= 2
-        plant *= 2
-    return {"human": human, "animal": animal, "plant": plant}
-
-
-def calculate_speed_and_squads(input_data: TribeInput) -> (int, int):
-    speed = 400 + input_data.trait_effects.speed_delta
-    if input_data.items.wagon and input_data.tech.wheel:
-        speed = int(speed * 1.5)
-    if input_data.cult == Cult.HEALTH:
-        speed += 50
-    elif input_data.cult == Cult.RENUNCIATION:
-        speed -= 50
-
-    max_squads = 1
-    fully_armed = input_data.weapons.bows >= input_data.population
-    if not fully_armed:
-        fully_armed = input_data.weapons.spears >= input_data.population
-    if not fully_armed:
-        fully_armed = input_data.weapons.clubs >= input_data.population
-
-    if fully_armed:
-        if input_data.weapons.bows >= input_data.population:
-            max_squads = 4
-        elif input_data.weapons.spears >= input_data.population:
-            max_squads = 3
-        else:
-            max_squads = 2
-    if input_data.items.wagon and input_data.tech.wheel:
-        max_squads = max(max_squads, 4)  # повозка снимает ограничения дистанций
-    return speed, max_squads
+def calculate_speed_and_squads(input_data: TribeInput, kernels: Kernels = PYTHON_KERNELS) -> Tuple[int, int]:
+    weapons = input_data.weapons
+    return kernels.speed_squads_kernel(
+        input_data.population,
+        weapons.clubs,
+        weapons.spears,
+        weapons.bows,
+        input_data.trait_effects.speed_delta,
+        input_data.items.wagon,
+        input_data.tech.wheel,
+        input_data.cult,
+    )
 
 
-def compute_stats(input_data: TribeInput) -> TribeStats:
-    fertility = calculate_fertility(input_data)
-    production = calculate_production(input_data)
-    battle = calculate_battle_stats(input_data)
+def _compute_stats(input_data: TribeInput, kernels: Kernels) -> TribeStats:
+    fertility = calculate_fertility(input_data, kernels)
+    production = calculate_production(input_data, kernels)
+    battle = calculate_battle_stats(input_data, kernels)
     science = calculate_science(input_data)
     dna_income = calculate_dna_income(input_data)
-    speed, squads = calculate_speed_and_squads(input_data)
+    speed, squads = calculate_speed_and_squads(input_data, kernels)
     return TribeStats(
         fertility=fertility,
         production=production,
@@ -352,43 +439,153 @@ def compute_stats(input_data: TribeInput) -> TribeStats:
     )
 
 
-def format_stats(stats: TribeStats) -> str:
-    lines = []
-    lines.append("[Рождаемость]")
-    lines.append(
-        f"Фертильность: {stats.fertility.fertility} | Смертность от холода: {stats.fertility.cold_mortality} | "
-        f"Смертность от болезней: {stats.fertility.disease_mortality} | Бонус от плотов: {stats.fertility.raft_bonus}"
-    )
-    lines.append(f"Прирост населения за ход: {stats.fertility.growth_rate}%")
+@lru_cache(maxsize=4096)
+def compute_stats(input_data: TribeInput) -> TribeStats:
+    return _compute_stats(input_data, PYTHON_KERNELS)
+
+
+def compute_stats_compiled(input_data: TribeInput) -> TribeStats:
+    """``compute_stats`` on the kernels from ``_core_numba.load_compiled_kernels()``.
+
+    Meant for simulation loops over many distinct tribes, so results are not cached. The
+    compiled kernels take int64 counts: non-integral inputs must go through
+    ``compute_stats``. Raises ``ImportError`` when neither the AOT extension nor Numba
+    is available.
+    """
+    return _compute_stats(input_data, load_compiled_kernels())
+
+
+# Независимые части TribeStats: update_stats пересчитывает только указанные из них.
+STAT_SECTIONS: Final = ("fertility", "production", "battle", "science", "dna_income", "speed_and_squads")
+
+
+def update_stats(stats: TribeStats, input_data: TribeInput, sections: Iterable[str]) -> TribeStats:
+    sections = set(sections)
+    changes: Dict[str, Any] = {}
+    if "fertility" in sections:
+        changes["fertility"] = calculate_fertility(input_data)
+    if "production" in sections:
+        changes["production"] = calculate_production(input_data)
+    if "battle" in sections:
+        changes["battle"] = calculate_battle_stats(input_data)
+    if "science" in sections:
+        changes["science"] = calculate_science(input_data)
+    if "dna_income" in sections:
+        changes["dna_income"] = calculate_dna_income(input_data)
+    if "speed_and_squads" in sections:
+        changes["speed"], changes["max_squads"] = calculate_speed_and_squads(input_data)
+    return replace(stats, **changes)
+
+
+def changed_sections(previous: TribeInput, input_data: TribeInput) -> Set[str]:
+    """Return the ``STAT_SECTIONS`` whose inputs differ between the two tribes."""
+    sections: Set[str] = set()
+    if previous == input_data:
+        return sections
+    flag_diff = previous._flags ^ input_data._flags
+    old_traits = previous.trait_effects
+    new_traits = input_data.trait_effects
+    old_tools = previous.tools
+    new_tools = input_data.tools
+    same_population = previous.population == input_data.population
+    same_weapons = previous.weapons == input_data.weapons
+    same_cult = previous.cult == input_data.cult
+
+    if (
+        flag_diff & _FERTILITY_FLAGS
+        or previous.base_fertility != input_data.base_fertility
+        or previous.climate != input_data.climate
+        or previous.water_body != input_data.water_body
+        or previous._eff_clothing != input_data._eff_clothing
+        or previous._eff_alcohol != input_data._eff_alcohol
+        or old_tools.rafts_pct != new_tools.rafts_pct
+        or old_traits.fertility_bonus != new_traits.fertility_bonus
+        or old_traits.cold_mortality_delta != new_traits.cold_mortality_delta
+        or old_traits.disease_mortality_delta != new_traits.disease_mortality_delta
+    ):
+        sections.add("fertility")
+    if (
+        not same_population
+        or not same_cult
+        or old_tools.hammers_pct != new_tools.hammers_pct
+        or previous._production_bp != input_data._production_bp
+    ):
+        sections.add("production")
+    if (
+        flag_diff & _BATTLE_FLAGS
+        or not same_population
+        or not same_weapons
+        or previous.experience != input_data.experience
+        or old_traits.bm_pct != new_traits.bm_pct
+    ):
+        sections.add("battle")
+    if flag_diff & _SCIENCE_FLAGS or not same_cult or old_traits.science_delta != new_traits.science_delta:
+        sections.add("science")
+    if flag_diff & _DNA_FLAGS or not same_cult:
+        sections.add("dna_income")
+    if (
+        flag_diff & _SPEED_FLAGS
+        or not same_population
+        or not same_weapons
+        or not same_cult
+        or old_traits.speed_delta != new_traits.speed_delta
+    ):
+        sections.add("speed_and_squads")
+    return sections
+
+
+def recompute_stats(stats: TribeStats, previous: TribeInput, input_data: TribeInput) -> TribeStats:
+    """Stats for ``input_data``, reusing the parts of ``stats`` (computed for ``previous``) that cannot change."""
+    sections = changed_sections(previous, input_data)
+    if not sections:
+        return stats
+    return update_stats(stats, input_data, sections)
+
+
+def _format_tenths(value: Union[int, float], scale: int) -> str:
+    # value / scale с одним знаком после запятой, половина округляется от нуля;
+    # дробные входы (например, нецелая численность) печатаются как есть
+    if not isinstance(value, int):
+        return f"{value / scale:.1f}"
+    tenths = (abs(value) * 10 + scale // 2) // scale
+    sign = "-" if value < 0 and tenths else ""
+    return f"{sign}{tenths // 10}.{tenths % 10}"
 
-    lines.append("\n[Производство]")
-    lines.append(
-        f"База ОП: {stats.production.base_op:.1f}, бонус от молотков: {stats.production.hammer_bonus:.1f}, "
-        f"итого: {stats.production.total_op:.1f}"
-    )
 
-    lines.append("\n[Боевая мощь]")
-    lines.append(
-        f"Используемое оружие: {stats.battle.weapon_usage}; БМ (сырое): {stats.battle.battle_power_raw:.0f}; "
-        f"БМ (норм.): {stats.battle.battle_power_scaled:.2f}"
-    )
-
-    lines.append("\n[Наука]")
-    lines.append(
-        f"Пассивная наука: {stats.science.passive_science}; бонусы: {stats.science.cult_bonus + stats.science.item_bonus}; "
-        f"Итого наука/ход: {stats.science.total_science}"
+def format_stats(stats: TribeStats) -> str:
+    f = stats.fertility
+    p = stats.production
+    b = stats.battle
+    w = b.weapon_usage
+    sc = stats.science
+    d = stats.dna_income
+    return (
+        f"[Рождаемость]\n"
+        f"Фертильность: {f.fertility} | Смертность от холода: {f.cold_mortality} | "
+        f"Смертность от болезней: {f.disease_mortality} | Бонус от плотов: {f.raft_bonus}\n"
+        f"Прирост населения за ход: {f.growth_rate}%\n"
+        f"\n[Производство]\n"
+        f"База ОП: {_format_tenths(p.base_op_scaled, OP_SCALE)}, "
+        f"бонус от молотков: {_format_tenths(p.hammer_bonus_scaled, OP_SCALE)}, "
+        f"итого: {_format_tenths(p.total_op_scaled_bp, TOTAL_OP_SCALE)}\n"
+        f"\n[Боевая мощь]\n"
+        f"Используемое оружие: bows={w.bows} spears={w.spears} clubs={w.clubs}; "
+        f"БМ (сырое): {b.battle_power_raw:.0f}; БМ (норм.): {b.battle_power_scaled:.2f}\n"
+        f"\n[Наука]\n"
+        f"Пассивная наука: {sc.passive_science}; бонусы: {sc.cult_bonus + sc.item_bonus}; "
+        f"Итого наука/ход: {sc.total_science}\n"
+        f"\n[ДНК]\n"
+        f"Человек: {d.human}; Животные: {d.animal}; Растения: {d.plant}\n"
+        f"\n[Скорость и отряды]\n"
+        f"Скорость: {stats.speed}; Максимум отрядов: {stats.max_squads}"
     )
 
-    lines.append("\n[ДНК]")
-    lines.append(f"Человек: {stats.dna_income['human']}; Животные: {stats.dna_income['animal']}; Растения: {stats.dna_income['plant']}")
-
-    lines.append("\n[Скорость и отряды]")
-    lines.append(f"Скорость: {stats.speed}; Максимум отрядов: {stats.max_squads}")
-
-    return "\n".join(lines)
-
 
 def launch_ui() -> None:
+    # Tk тянет за собой Tcl, поэтому импортируем его только при запуске интерфейса
+    import tkinter as tk
+    from tkinter import ttk
+
     root = tk.Tk()
     root.title("Расчёт статистики племени")
 
@@ -397,9 +594,22 @@ def launch_ui() -> None:
     root.columnconfigure(0, weight=1)
     root.rowconfigure(0, weight=1)
 
+    # Изменение поля откладывает пересчёт на 50 мс, чтобы серия нажатий клавиш приводила
+    # к одному пересчёту; recompute_stats сам определяет разделы по прошлому TribeInput.
+    recompute_state: Dict[str, Any] = {"input": None, "stats": None, "after_id": None}
+
+    def schedule_recompute() -> None:
+        if recompute_state["after_id"] is not None:
+            root.after_cancel(recompute_state["after_id"])
+        recompute_state["after_id"] = root.after(50, compute_and_show)
+
+    def watch(var):
+        var.trace_add("write", lambda *_: schedule_recompute())
+        return var
+
     def labeled_entry(parent: ttk.Frame, text: str, default: int, row: int, column: int = 0):
         ttk.Label(parent, text=text).grid(row=row, column=column, sticky="w", padx=(0, 6))
-        var = tk.IntVar(value=default)
+        var = watch(tk.IntVar(value=default))
         entry = ttk.Entry(parent, textvariable=var, width=8)
         entry.grid(row=row, column=column + 1, sticky="w")
         return var
@@ -414,42 +624,42 @@ def launch_ui() -> None:
     row_idx += 1
     fertility_var = labeled_entry(content, "Фертильность", 40, row_idx)
 
-    climate_var = tk.StringVar(value=Climate.TROPICAL.value)
+    climate_var = watch(tk.StringVar(value=Climate.TROPICAL.name.lower()))
     ttk.Label(content, text="Климат").grid(row=row_idx, column=2, sticky="w", padx=(0, 6))
     ttk.Combobox(
         content,
         textvariable=climate_var,
-        values=[c.value for c in Climate],
+        values=[c.name.lower() for c in Climate],
         state="readonly",
         width=14,
     ).grid(row=row_idx, column=3, sticky="w")
     row_idx += 1
 
-    water_var = tk.StringVar(value=WaterBody.NONE.value)
+    water_var = watch(tk.StringVar(value=WaterBody.NONE.name.lower()))
     ttk.Label(content, text="Водоём рядом").grid(row=row_idx, column=0, sticky="w", padx=(0, 6))
     ttk.Combobox(
         content,
         textvariable=water_var,
-        values=[w.value for w in WaterBody],
+        values=[w.name.lower() for w in WaterBody],
         state="readonly",
         width=14,
     ).grid(row=row_idx, column=1, sticky="w")
 
-    fresh_water_var = tk.BooleanVar(value=False)
+    fresh_water_var = watch(tk.BooleanVar(value=False))
     tk.Checkbutton(content, text="Пресная вода рядом", variable=fresh_water_var).grid(
         row=row_idx, column=2, columnspan=2, sticky="w"
     )
     row_idx += 1
 
-    has_fish_var = tk.BooleanVar(value=False)
+    has_fish_var = watch(tk.BooleanVar(value=False))
     tk.Checkbutton(content, text="Есть ресурс рыбы", variable=has_fish_var).grid(
         row=row_idx, column=0, columnspan=2, sticky="w"
     )
 
     ttk.Label(content, text="Культ").grid(row=row_idx, column=2, sticky="w", padx=(0, 6))
-    cult_var = tk.StringVar(value=Cult.NONE.value)
+    cult_var = watch(tk.StringVar(value=Cult.NONE.name.lower()))
     ttk.Combobox(
-        content, textvariable=cult_var, values=[c.value for c in Cult], state="readonly", width=14
+        content, textvariable=cult_var, values=[c.name.lower() for c in Cult], state="readonly", width=14
     ).grid(row=row_idx, column=3, sticky="w")
     row_idx += 1
 
@@ -458,13 +668,13 @@ def launch_ui() -> None:
     )
     row_idx += 1
     tech_states = {
-        "agriculture": tk.BooleanVar(value=False),
-        "husbandry": tk.BooleanVar(value=False),
-        "wheel": tk.BooleanVar(value=False),
-        "building": tk.BooleanVar(value=False),
-        "swimming": tk.BooleanVar(value=False),
-        "alcoholism": tk.BooleanVar(value=False),
-        "clothes": tk.BooleanVar(value=False),
+        "agriculture": watch(tk.BooleanVar(value=False)),
+        "husbandry": watch(tk.BooleanVar(value=False)),
+        "wheel": watch(tk.BooleanVar(value=False)),
+        "building": watch(tk.BooleanVar(value=False)),
+        "swimming": tk.BooleanVar(value=False),  # пока ни на что не влияет
+        "alcoholism": watch(tk.BooleanVar(value=False)),
+        "clothes": watch(tk.BooleanVar(value=False)),
     }
     tech_labels = {
         "agriculture": "Земледелие",
@@ -505,9 +715,9 @@ def launch_ui() -> None:
         row=row_idx, column=0, columnspan=4, sticky="w", pady=(8, 0)
     )
     row_idx += 1
-    settlement_var = tk.BooleanVar(value=False)
-    wagon_var = tk.BooleanVar(value=False)
-    casino_var = tk.BooleanVar(value=False)
+    settlement_var = watch(tk.BooleanVar(value=False))
+    wagon_var = watch(tk.BooleanVar(value=False))
+    casino_var = watch(tk.BooleanVar(value=False))
     tk.Checkbutton(content, text="Поселение", variable=settlement_var).grid(row=row_idx, column=0, sticky="w")
     tk.Checkbutton(content, text="Повозка", variable=wagon_var).grid(row=row_idx, column=1, sticky="w")
     tk.Checkbutton(content, text="Тотем казино", variable=casino_var).grid(row=row_idx, column=2, sticky="w")
@@ -535,14 +745,18 @@ def launch_ui() -> None:
     row_idx += 1
 
     def compute_and_show() -> None:
+        # кнопка «Рассчитать» вызывает пересчёт напрямую, поэтому отложенный больше не нужен
+        if recompute_state["after_id"] is not None:
+            root.after_cancel(recompute_state["after_id"])
+            recompute_state["after_id"] = None
         try:
             input_data = TribeInput(
                 population=max(0, population_var.get()),
                 experience=max(0, experience_var.get()),
                 base_fertility=fertility_var.get(),
-                climate=Climate(climate_var.get()),
+                climate=Climate[climate_var.get().upper()],
                 near_fresh_water=fresh_water_var.get(),
-                water_body=WaterBody(water_var.get()),
+                water_body=WaterBody[water_var.get().upper()],
                 has_fish_resource=has_fish_var.get(),
                 tools=ToolCoverage(
                     hammers_pct=max(0, hammers_var.get()),
@@ -569,7 +783,7 @@ def launch_ui() -> None:
                     alcoholism=tech_states["alcoholism"].get(),
                     clothes=tech_states["clothes"].get(),
                 ),
-                cult=Cult(cult_var.get()),
+                cult=Cult[cult_var.get().upper()],
                 trait_effects=TraitEffects(
                     fertility_bonus=trait_fertility_var.get(),
                     cold_mortality_delta=trait_cold_var.get(),
@@ -585,7 +799,13 @@ def launch_ui() -> None:
             output_box.insert(tk.END, f"Ошибка ввода: {exc}")
             return
 
-        stats = compute_stats(input_data)
+        previous = recompute_state["input"]
+        if previous is None:
+            stats = compute_stats(input_data)
+        else:
+            stats = recompute_stats(recompute_state["stats"], previous, input_data)
+        recompute_state["input"] = input_data
+        recompute_state["stats"] = stats
         output_box.delete("1.0", tk.END)
         output_box.insert(tk.END, format_stats(stats))
 
@@ -598,6 +818,8 @@ def launch_ui() -> None:
 
 
 def main() -> None:
+    import argparse
+
     parser = argparse.ArgumentParser(description="Tribe statistics calculator")
     parser.add_argument("--ui", action="store_true", help="Запустить графический интерфейс")
     args = parser.parse_args()
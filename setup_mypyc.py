@@ -0,0 +1,21 @@
+"""
+Compile ``settlement_stats`` and ``_core_numba`` into native extensions with mypyc.
+
+    python setup_mypyc.py build_ext --inplace
+
+The compiled modules shadow the ``.py`` files on import and keep the same API; delete
+the generated extensions to go back to the interpreted versions. Requires mypy and a C
+compiler. The kernels in ``_core_numba`` are typed, so their arithmetic and table
+lookups run as native code; they then accept only whole-number counts, as
+``TribeInput`` already does in this build. ``load_compiled_kernels`` still works: Numba
+compiles the kernels from the ``_core_numba.py`` source.
+"""
+from setuptools import setup
+
+from mypyc.build import mypycify
+
+setup(
+    name="settlement_stats",
+    py_modules=[],
+    ext_modules=mypycify(["settlement_stats.py", "_core_numba.py"]),
+)
@@ -0,0 +1,312 @@
+"""Скалярный compute_stats, пакетный compute_batch и TribeWorld должны давать одно и то же."""
+
+import dataclasses
+import importlib
+import importlib.util
+import math
+import random
+import subprocess
+import sys
+import unittest
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
+from _core_numba import KERNEL_SIGNATURES, Kernels, load_compiled_kernels
+from settlement_batch import TribeBatch, TribeWorld, compute_batch, compute_stats_batch, inputs_to_arrays
+from settlement_stats import (
+    Climate,
+    Cult,
+    Items,
+    TechState,
+    ToolCoverage,
+    TraitEffects,
+    TribeInput,
+    TribeStats,
+    WaterBody,
+    WeaponStock,
+    calculate_battle_stats,
+    calculate_fertility,
+    calculate_production,
+    calculate_speed_and_squads,
+    changed_sections,
+    compute_stats,
+    compute_stats_compiled,
+    recompute_stats,
+)
+
+FLOAT_KEYS = (
+    "base_op",
+    "hammer_bonus",
+    "cult_modifier",
+    "trait_modifier",
+    "total_op",
+    "battle_power_raw",
+    "battle_power_scaled",
+)
+# Скомпилированные ядра дают либо расширение build_aot.py, либо Numba.
+HAVE_COMPILED = any(importlib.util.find_spec(name) for name in ("settlement_stats_kernels", "numba"))
+
+
+def _random_input(rng: random.Random) -> TribeInput:
+    def flag() -> bool:
+        return rng.random() < 0.5
+
+    return TribeInput(
+        population=rng.randrange(0, 5000),
+        experience=rng.randrange(0, 10),
+        base_fertility=rng.randrange(0, 80),
+        climate=rng.choice(list(Climate)),
+        near_fresh_water=flag(),
+        water_body=rng.choice(list(WaterBody)),
+        has_fish_resource=flag(),
+        tools=ToolCoverage(
+            hammers_pct=rng.randrange(0, 11) * 10,
+            clothing_pct=rng.randrange(0, 6) * 20,
+            alcohol_pct=rng.randrange(0, 21) * 5,
+            rafts_pct=rng.randrange(0, 6) * 20,
+        ),
+        weapons=WeaponStock(clubs=rng.randrange(0, 3000), spears=rng.randrange(0, 3000), bows=rng.randrange(0, 3000)),
+        items=Items(settlement=flag(), wagon=flag(), casino_totem=flag()),
+        tech=TechState(
+            agriculture=flag(),
+            husbandry=flag(),
+            wheel=flag(),
+            building=flag(),
+            swimming=flag(),
+            alcoholism=flag(),
+            clothes=flag(),
+        ),
+        cult=rng.choice(list(Cult)),
+        trait_effects=TraitEffects(
+            fertility_bonus=rng.randrange(-10, 11),
+            cold_mortality_delta=rng.randrange(-5, 6),
+            disease_mortality_delta=rng.randrange(-5, 6),
+            production_pct=rng.randrange(-50, 51) / 100.0,
+            bm_pct=rng.randrange(-50, 51) / 100.0,
+            speed_delta=rng.randrange(-100, 101),
+            science_delta=rng.randrange(-5, 6),
+        ),
+    )
+
+
+def _fixed_inputs() -> List[TribeInput]:
+    rng = random.Random(20240501)
+    inputs = [
+        TribeInput(),
+        TribeInput(population=0, experience=0),
+        TribeInput(water_body=WaterBody.SEA, has_fish_resource=True, tools=ToolCoverage(rafts_pct=100)),
+        TribeInput(tools=ToolCoverage(hammers_pct=100, clothing_pct=100, alcohol_pct=100, rafts_pct=20)),
+        TribeInput(trait_effects=TraitEffects(production_pct=0.00015, bm_pct=-1.0)),
+        TribeInput(population=10, weapons=WeaponStock(clubs=100, spears=100, bows=100)),
+    ]
+    inputs.extend(_random_input(rng) for _ in range(500))
+    return inputs
+
+
+# Базовое племя для проверок пересчёта: одежда и алкоголь включены и не нулевые, чтобы
+# их проценты влияли на смертность.
+_BASE_INPUT = TribeInput(
+    population=900,
+    tools=ToolCoverage(hammers_pct=20, clothing_pct=40, alcohol_pct=15, rafts_pct=40),
+    weapons=WeaponStock(clubs=100, spears=200, bows=300),
+    water_body=WaterBody.RIVER,
+    tech=TechState(clothes=True, alcoholism=True),
+)
+
+FERTILITY = frozenset({"fertility"})
+PRODUCTION = frozenset({"production"})
+BATTLE = frozenset({"battle"})
+SCIENCE = frozenset({"science"})
+SPEED = frozenset({"speed_and_squads"})
+DNA = frozenset({"dna_income"})
+
+# (вложенный датакласс или None, поле, новое значение, разделы, которые должны пересчитаться)
+_SINGLE_FIELD_CHANGES: Tuple[Tuple[Any, str, Any, FrozenSet[str]], ...] = (
+    (None, "population", 901, PRODUCTION | BATTLE | SPEED),
+    (None, "experience", 5, BATTLE),
+    (None, "base_fertility", 41, FERTILITY),
+    (None, "climate", Climate.SNOW, FERTILITY),
+    (None, "near_fresh_water", True, FERTILITY),
+    (None, "water_body", WaterBody.SEA, FERTILITY),
+    (None, "has_fish_resource", True, FERTILITY),
+    (None, "cult", Cult.RENUNCIATION, PRODUCTION | SCIENCE | DNA | SPEED),
+    ("tools", "hammers_pct", 30, PRODUCTION),
+    ("tools", "clothing_pct", 60, FERTILITY),
+    ("tools", "alcohol_pct", 20, FERTILITY),
+    ("tools", "rafts_pct", 60, FERTILITY),
+    ("weapons", "clubs", 101, BATTLE | SPEED),
+    ("weapons", "spears", 201, BATTLE | SPEED),
+    ("weapons", "bows", 301, BATTLE | SPEED),
+    ("items", "settlement", True, BATTLE | SCIENCE),
+    ("items", "wagon", True, SPEED),
+    ("items", "casino_totem", True, frozenset()),
+    ("tech", "agriculture", True, FERTILITY | DNA),
+    ("tech", "husbandry", True, FERTILITY | DNA),
+    ("tech", "wheel", True, SPEED),
+    ("tech", "building", True, SCIENCE),
+    ("tech", "swimming", True, frozenset()),
+    ("tech", "alcoholism", False, FERTILITY | DNA),
+    ("tech", "clothes", False, FERTILITY),
+    ("trait_effects", "fertility_bonus", 1, FERTILITY),
+    ("trait_effects", "cold_mortality_delta", 1, FERTILITY),
+    ("trait_effects", "disease_mortality_delta", 1, FERTILITY),
+    ("trait_effects", "production_pct", 0.1, PRODUCTION),
+    ("trait_effects", "bm_pct", 0.1, BATTLE),
+    ("trait_effects", "speed_delta", 1, SPEED),
+    ("trait_effects", "science_delta", 1, SCIENCE),
+)
+
+
+def _with_change(input_data: TribeInput, parent: Any, name: str, value: Any) -> TribeInput:
+    if parent is None:
+        return dataclasses.replace(input_data, **{name: value})
+    nested = dataclasses.replace(getattr(input_data, parent), **{name: value})
+    return dataclasses.replace(input_data, **{parent: nested})
+
+
+def _scalar_row(stats: TribeStats) -> Dict[str, float]:
+    f = stats.fertility
+    p = stats.production
+    b = stats.battle
+    sc = stats.science
+    return {
+        "fertility": f.fertility,
+        "cold_mortality": f.cold_mortality,
+        "disease_mortality": f.disease_mortality,
+        "raft_bonus": f.raft_bonus,
+        "growth_rate": f.growth_rate,
+        "base_op": p.base_op,
+        "hammer_bonus": p.hammer_bonus,
+        "cult_modifier": p.cult_modifier,
+        "trait_modifier": p.trait_modifier,
+        "total_op": p.total_op,
+        "battle_power_raw": b.battle_power_raw,
+        "battle_power_scaled": b.battle_power_scaled,
+        "bows_used": b.weapon_usage.bows,
+        "spears_used": b.weapon_usage.spears,
+        "clubs_used": b.weapon_usage.clubs,
+        "passive_science": sc.passive_science,
+        "cult_bonus": sc.cult_bonus,
+        "item_bonus": sc.item_bonus,
+        "total_science": sc.total_science,
+        "dna_human": stats.dna_income.human,
+        "dna_animal": stats.dna_income.animal,
+        "dna_plant": stats.dna_income.plant,
+        "speed": stats.speed,
+        "max_squads": stats.max_squads,
+    }
+
+
+class ParityTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.inputs = _fixed_inputs()
+
+    def assert_matches_scalar(self, result: Dict[str, np.ndarray]) -> None:
+        for i, input_data in enumerate(self.inputs):
+            for key, expected in _scalar_row(compute_stats(input_data)).items():
+                actual = result[key][i].item()
+                with self.subTest(tribe=i, key=key):
+                    if key in FLOAT_KEYS:
+                        self.assertTrue(math.isclose(actual, expected, rel_tol=1e-12, abs_tol=1e-9), (actual, expected))
+                    else:
+                        self.assertEqual(actual, expected)
+
+    def test_batch_matches_scalar(self) -> None:
+        self.assert_matches_scalar(compute_batch(TribeBatch.from_inputs(self.inputs)).as_dict())
+        self.assert_matches_scalar(compute_stats_batch(inputs_to_arrays(self.inputs)))
+
+    def test_world_round_trip(self) -> None:
+        world = TribeWorld.from_inputs(self.inputs, capacity=1)
+        self.assertEqual(len(world), len(self.inputs))
+        for i, input_data in enumerate(self.inputs):
+            self.assertEqual(world.to_input(i), input_data)
+        self.assert_matches_scalar(compute_batch(world.to_batch()).as_dict())
+
+    def test_recompute_matches_full(self) -> None:
+        for previous, input_data in zip(self.inputs, self.inputs[1:]):
+            stats = recompute_stats(compute_stats(previous), previous, input_data)
+            self.assertEqual(stats, compute_stats(input_data))
+
+    def test_single_field_changes(self) -> None:
+        previous = _BASE_INPUT
+        base_stats = compute_stats(previous)
+        for parent, name, value, expected in _SINGLE_FIELD_CHANGES:
+            input_data = _with_change(previous, parent, name, value)
+            with self.subTest(field=name):
+                self.assertEqual(changed_sections(previous, input_data), expected)
+                self.assertEqual(recompute_stats(base_stats, previous, input_data), compute_stats(input_data))
+        self.assertEqual(changed_sections(previous, _with_change(previous, None, "population", 900)), set())
+
+    def test_ineffective_changes_reuse_everything(self) -> None:
+        # без технологии одежды/алкоголизма их проценты ни на что не влияют
+        previous = _with_change(_BASE_INPUT, "tech", "clothes", False)
+        previous = _with_change(previous, "tech", "alcoholism", False)
+        for name in ("clothing_pct", "alcohol_pct"):
+            input_data = _with_change(previous, "tools", name, 100)
+            with self.subTest(field=name):
+                self.assertEqual(changed_sections(previous, input_data), set())
+                self.assertEqual(recompute_stats(compute_stats(previous), previous, input_data), compute_stats(input_data))
+
+    def test_large_counts_do_not_overflow(self) -> None:
+        big = TribeInput(population=2_000_000_000, weapons=WeaponStock(bows=2_000_000_000))
+        expected = _scalar_row(compute_stats(big))["battle_power_raw"]
+        self.assertEqual(compute_batch(TribeBatch.from_inputs([big])).battle_power_raw[0], expected)
+        self.assertEqual(compute_batch(TribeWorld.from_inputs([big]).to_batch()).battle_power_raw[0], expected)
+
+    def test_non_integral_counts_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            TribeBatch.from_arrays({"population": np.array([10.5])})
+        try:
+            fractional = TribeInput(population=10.5)  # type: ignore[arg-type]
+        except TypeError:
+            self.skipTest("TribeInput, собранный mypyc, сам отвергает нецелые поля")
+        with self.assertRaises(ValueError):
+            inputs_to_arrays([fractional])
+        with self.assertRaises(ValueError):
+            TribeWorld().add_tribe(fractional)
+
+
+@unittest.skipUnless(HAVE_COMPILED, "нет ни Numba, ни расширения build_aot.py")
+class CompiledParityTest(unittest.TestCase):
+    def test_compiled_matches_python(self) -> None:
+        for i, input_data in enumerate(_fixed_inputs()):
+            with self.subTest(tribe=i):
+                self.assertEqual(compute_stats_compiled(input_data), compute_stats(input_data))
+
+    def test_kernels_keep_their_declared_signatures(self) -> None:
+        kernels = load_compiled_kernels()
+        for input_data in _fixed_inputs():
+            compute_stats_compiled(input_data)
+        for name, kernel in kernels._asdict().items():
+            # у диспетчера Numba с явной сигнатурой новых специализаций появляться не должно;
+            # у функций из расширения build_aot.py атрибута signatures нет
+            signatures = getattr(kernel, "signatures", None)
+            if signatures is not None:
+                with self.subTest(kernel=name):
+                    self.assertEqual(len(signatures), 1, KERNEL_SIGNATURES[name])
+
+    @unittest.skipUnless(importlib.util.find_spec("settlement_stats_kernels"), "расширение build_aot.py не собрано")
+    def test_aot_kernels_match_python(self) -> None:
+        module = importlib.import_module("settlement_stats_kernels")
+        kernels = Kernels(**{name: getattr(module, name) for name in KERNEL_SIGNATURES})
+        for i, input_data in enumerate(_fixed_inputs()):
+            with self.subTest(tribe=i):
+                self.assertEqual(calculate_fertility(input_data, kernels), calculate_fertility(input_data))
+                self.assertEqual(calculate_battle_stats(input_data, kernels), calculate_battle_stats(input_data))
+                self.assertEqual(calculate_production(input_data, kernels), calculate_production(input_data))
+                self.assertEqual(
+                    calculate_speed_and_squads(input_data, kernels), calculate_speed_and_squads(input_data)
+                )
+
+
+class ImportTest(unittest.TestCase):
+    def test_import_does_not_load_numba(self) -> None:
+        # Numba подключается только при первом вызове compute_stats_compiled
+        code = "import sys, settlement_stats, settlement_batch; print('numba' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
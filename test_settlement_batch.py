@@ -0,0 +1,30 @@
+"""Проверка входных массивов settlement_batch."""
+
+import unittest
+
+import numpy as np
+
+from settlement_batch import TribeBatch, compute_stats_batch
+from settlement_stats import Climate, Cult, WaterBody
+
+
+class FromArraysTest(unittest.TestCase):
+    def test_unknown_fields_are_rejected(self) -> None:
+        with self.assertRaisesRegex(ValueError, "hamers_pct"):
+            compute_stats_batch({"population": np.array([100]), "hamers_pct": np.array([100])})
+
+    def test_codes_outside_the_enum_are_rejected(self) -> None:
+        for key, enum in (("climate", Climate), ("water_body", WaterBody), ("cult", Cult)):
+            for code in (-1, len(enum), 258):
+                with self.subTest(key=key, code=code), self.assertRaisesRegex(ValueError, key):
+                    TribeBatch.from_arrays({key: np.array([0, code])})
+
+    def test_every_enum_code_is_accepted(self) -> None:
+        for key, enum in (("climate", Climate), ("water_body", WaterBody), ("cult", Cult)):
+            with self.subTest(key=key):
+                column = getattr(TribeBatch.from_arrays({key: np.array([int(v) for v in enum])}), key)
+                self.assertEqual(column.tolist(), [int(v) for v in enum])
+
+
+if __name__ == "__main__":
+    unittest.main()
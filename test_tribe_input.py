@@ -0,0 +1,87 @@
+"""TribeInput должен вести себя как обычный замороженный dataclass."""
+
+import copy
+import dataclasses
+import pickle
+import unittest
+
+from settlement_stats import (
+    Climate,
+    Cult,
+    Items,
+    TechState,
+    ToolCoverage,
+    TraitEffects,
+    TribeInput,
+    WaterBody,
+    WeaponStock,
+    compute_stats,
+)
+
+
+def _sample_input() -> TribeInput:
+    return TribeInput(
+        population=1234,
+        climate=Climate.POLAR,
+        water_body=WaterBody.SEA,
+        has_fish_resource=True,
+        tools=ToolCoverage(hammers_pct=30, clothing_pct=40, alcohol_pct=15, rafts_pct=60),
+        weapons=WeaponStock(clubs=5, spears=6, bows=7),
+        items=Items(settlement=True),
+        tech=TechState(husbandry=True, clothes=True, alcoholism=True),
+        cult=Cult.LABOUR,
+        trait_effects=TraitEffects(production_pct=0.25, bm_pct=-0.1),
+    )
+
+
+class CopyTest(unittest.TestCase):
+    def test_round_trips(self) -> None:
+        for input_data in (TribeInput(), _sample_input()):
+            for name, clone in (
+                ("pickle", lambda t: pickle.loads(pickle.dumps(t))),
+                ("copy", copy.copy),
+                ("deepcopy", copy.deepcopy),
+            ):
+                with self.subTest(copy=name):
+                    restored = clone(input_data)
+                    self.assertEqual(restored, input_data)
+                    self.assertEqual(hash(restored), hash(input_data))
+                    self.assertEqual(compute_stats(restored), compute_stats(input_data))
+                    stats = compute_stats(input_data)
+                    self.assertEqual(clone(stats), stats)
+
+
+class SchemaTest(unittest.TestCase):
+    PUBLIC_FIELDS = (
+        "population",
+        "experience",
+        "base_fertility",
+        "climate",
+        "near_fresh_water",
+        "water_body",
+        "has_fish_resource",
+        "tools",
+        "weapons",
+        "items",
+        "tech",
+        "cult",
+        "trait_effects",
+    )
+
+    def test_derived_values_stay_out_of_the_schema(self) -> None:
+        input_data = _sample_input()
+        self.assertEqual(tuple(f.name for f in dataclasses.fields(input_data)), self.PUBLIC_FIELDS)
+        self.assertEqual(tuple(dataclasses.asdict(input_data)), self.PUBLIC_FIELDS)
+        self.assertEqual(len(dataclasses.astuple(input_data)), len(self.PUBLIC_FIELDS))
+        self.assertNotIn("_flags", repr(input_data))
+
+    def test_replace_recomputes_derived_values(self) -> None:
+        replaced = dataclasses.replace(_sample_input(), tech=TechState())
+        fresh = TribeInput(**{name: getattr(replaced, name) for name in self.PUBLIC_FIELDS})
+        for name in ("_eff_clothing", "_eff_alcohol", "_raft_flags", "_flags", "_production_bp", "_hash"):
+            with self.subTest(name=name):
+                self.assertEqual(getattr(replaced, name), getattr(fresh, name))
+
+
+if __name__ == "__main__":
+    unittest.main()